@@ -0,0 +1,159 @@
+#! /usr/local/bin/python3
+
+import argparse
+from html import escape
+
+import dash_bootstrap_components as dbc
+from dash import html
+
+from generator import CONTENT_STYLE, ET, XML_PARSER, normalize, parse_element
+
+
+# The generator emits a small, fixed set of components, so the tree can be
+# serialized to plain Bootstrap markup directly instead of going through
+# the Dash renderer. The output only needs the Bootstrap stylesheet.
+
+VOID_TAGS = frozenset(("br", "hr", "img"))
+
+PAGE = """<!DOCTYPE html>
+<html>
+    <head>
+        <meta charset="utf-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1">
+        <link rel="stylesheet" href="{stylesheet}">
+    </head>
+    <body>
+        {body}
+    </body>
+</html>
+"""
+
+def make_tag(name, children="", classes=(), style=None, attrs=None):
+    parts = [name]
+
+    class_attr = " ".join(c for c in classes if c)
+    if class_attr:
+        parts.append('class="%s"' % escape(class_attr, quote=True))
+
+    if style:
+        style_attr = "; ".join(f"{key}: {value}" for key, value in style.items())
+        parts.append('style="%s"' % escape(style_attr, quote=True))
+
+    for key, value in (attrs or {}).items():
+        if value is not None:
+            parts.append('%s="%s"' % (key, escape(str(value), quote=True)))
+
+    opening = "<%s>" % " ".join(parts)
+    if name in VOID_TAGS:
+        return opening
+    return f"{opening}{children}</{name}>"
+
+def render_row(props, children, classes):
+    return make_tag("div", children, ["row"] + classes)
+
+def render_col(props, children, classes):
+    width = props.get("width")
+    column = "col" if width is None else f"col-{width}"
+    return make_tag("div", children, [column] + classes)
+
+def render_card(props, children, classes):
+    return make_tag("div", children, ["card"] + classes)
+
+def render_card_header(props, children, classes):
+    return make_tag("div", children, ["card-header"] + classes)
+
+def render_card_body(props, children, classes):
+    return make_tag("div", children, ["card-body"] + classes)
+
+def render_card_img(props, children, classes):
+    return make_tag("img", "", ["card-img"] + classes, attrs={"src": props.get("src")})
+
+def render_badge(props, children, classes):
+    color = props.get("color", "secondary")
+    base = ["badge", f"text-bg-{color}"]
+    href = props.get("href")
+    if href is not None:
+        return make_tag("a", children, base + classes, attrs={"href": href})
+    return make_tag("span", children, base + classes)
+
+def render_button(props, children, classes):
+    color = props.get("color", "primary")
+    variant = f"btn-outline-{color}" if props.get("outline") else f"btn-{color}"
+    base = ["btn", variant]
+    href = props.get("href")
+    if href is not None:
+        return make_tag("a", children, base + classes, attrs={"href": href, "role": "button"})
+    return make_tag("button", children, base + classes, attrs={"type": "button"})
+
+def render_button_group(props, children, classes):
+    return make_tag("div", children, ["btn-group"] + classes, attrs={"role": "group"})
+
+def render_progress(props, children, classes):
+    value = props.get("value", 0)
+    bar = make_tag("div", "", ["progress-bar"], style={"width": f"{value}%"})
+    return make_tag("div", bar, ["progress"] + classes)
+
+BOOTSTRAP_RENDERERS = {
+    "Row": render_row,
+    "Col": render_col,
+    "Card": render_card,
+    "CardHeader": render_card_header,
+    "CardBody": render_card_body,
+    "CardImg": render_card_img,
+    "Badge": render_badge,
+    "Button": render_button,
+    "ButtonGroup": render_button_group,
+    "Progress": render_progress,
+}
+
+def render(node):
+    if node is None:
+        return ""
+    if isinstance(node, (list, tuple)):
+        return "".join(render(child) for child in node)
+    if not hasattr(node, "to_plotly_json"):
+        return escape(str(node))
+
+    data = node.to_plotly_json()
+    props = data["props"]
+    children = render(props.get("children"))
+    classes = [props.get("className", "")]
+
+    # Plain html.* components map straight to their tag
+    if data["namespace"] == "dash_html_components":
+        return make_tag(data["type"].lower(), children, classes, props.get("style"))
+
+    try:
+        renderer = BOOTSTRAP_RENDERERS[data["type"]]
+    except KeyError:
+        raise RuntimeError(f"Cant render component '{data['type']}' statically")
+    return renderer(props, children, classes)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Static web page builder. Renders the page once and "
+                    "writes it as plain HTML, so no Dash server is needed "
+                    "to serve it."
+        )
+    parser.add_argument(
+        '--input',
+        required=True,
+        help='Input XML file for generation.'
+        )
+    parser.add_argument(
+        '--output',
+        default='index.html',
+        help='Output HTML file.'
+        )
+    args = parser.parse_args()
+
+    myroot = ET.parse(args.input, XML_PARSER).getroot()
+    normalize(myroot)
+
+    content = []
+    content.append(parse_element(myroot))
+
+    body = render(html.Div(content, style=CONTENT_STYLE))
+
+    with open(args.output, "w") as f:
+        f.write(PAGE.format(stylesheet=dbc.themes.BOOTSTRAP, body=body))
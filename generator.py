@@ -1,100 +1,138 @@
 #! /usr/local/bin/python3
 
 import argparse
-import xml.etree.ElementTree as ET
+import logging
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import zip_longest
+from lxml import etree as ET
 import dash
 import dash_bootstrap_components as dbc
 from dash import html
 
 
-# Default parser
-class DefaultParser:
-    tag = None
-    columns = 1
-    def parse(self, element):
-        print(f"Unknown tag: {element.tag}")
-        content = []
-        for child in element:
-            content.append(parse_element(child))
+log = logging.getLogger(__name__)
 
-        if "columns" in element.attrib:
-            cols = int(element.attrib["columns"])
-        else:
-            cols = self.__class__.columns
+# Drop comments and processing instructions while parsing, like ElementTree
+# did implicitly; they would otherwise show up as child nodes during rendering
+XML_PARSER = ET.XMLParser(remove_comments=True, remove_pis=True)
+
+
+# Shared spacer; layout spacers carry no state so one instance can be
+# reused everywhere
+EMPTY_P = html.P()
 
-        # Fill missing columns with empty space (Prevents stretching of last column)
-        missing_elements = cols - (len(content) % cols)
-        for _ in range(missing_elements):
-            content.append(html.P())
+CONTENT_STYLE = {
+    "margin-left": "3rem",
+    "margin-right": "3rem",
+    "padding": "2rem 1rem",
+}
 
-        # Create columns
-        rows = []
 
-        if "heading" in element.attrib:
-            rows.append(html.H1(element.attrib["heading"]))
+# Default parser
+@lru_cache(maxsize=None)
+def make_default_assemble(cols, heading):
+    # Bake the column count and heading into a specialized assembler;
+    # sections sharing a layout shape reuse the same closure
+    heading_row = html.H1(heading) if heading is not None else None
+
+    def assemble(content):
+        rows = [] if heading_row is None else [heading_row]
 
-        for i in range(0, len(content), cols):
-            rows.append(dbc.Row([dbc.Col(j) for j in content[i:i+cols]]))
-            rows.append(html.P())
+        # zip_longest pads the last row with empty space, which prevents
+        # stretching of the last column
+        for chunk in zip_longest(*[iter(content)] * cols, fillvalue=EMPTY_P):
+            rows.append(dbc.Row(list(map(dbc.Col, chunk))))
+            rows.append(EMPTY_P)
 
         return html.Div(rows)
 
+    return assemble
+
+class DefaultParser:
+    __slots__ = ()
+    tag = None
+    columns = 1
+    def assemble(self, element, content):
+        log.debug("Unknown tag: %s", element.tag)
+        attrib = element.attrib
+        if "columns" in attrib:
+            cols = int(attrib["columns"])
+        else:
+            cols = self.__class__.columns
+
+        return make_default_assemble(cols, attrib.get("heading"))(content)
+
 # Low-level parsers
 class ContentParser:
+    __slots__ = ()
     def get_content(self, element):
-        return element.text.strip()
+        # Text is stripped up front by normalize()
+        return element.text
 
 class TextParser(ContentParser):
+    __slots__ = ()
     tag = "text"
     def parse(self, element):
         return html.P(self.get_content(element))
 
 class TimeParser(TextParser):
+    __slots__ = ()
     tag = "time"
 
 class DateParser(TimeParser):
+    __slots__ = ()
     tag = "date"
 
 class HeadingParser(ContentParser):
+    __slots__ = ()
     tag = "head"
     def parse(self, element):
         return html.H1(self.get_content(element))
 
 class SubHeadingParser(ContentParser):
+    __slots__ = ()
     tag = "subhead"
     def parse(self, element):
         return html.H3(self.get_content(element))
 
 class TagParser(ContentParser):
+    __slots__ = ()
     tag = "tag"
     def parse(self, element):
         return dbc.Badge(self.get_content(element), className="ms-1")
 
 class LinkParser(ContentParser):
+    __slots__ = ()
     tag = "link"
     def parse(self, element):
-        content = self.get_content(element).split(";")
-        heading = content[0].strip()
-        link = content[1].strip()
         return dbc.Badge(
-            heading,
+            element.get("_head"),
             external_link=True,
-            href=link,
+            href=element.get("_link"),
             color="primary",
             className="ms-1"
             )
 
+# CurrentParser output is constant, build the badge once and share it
+_CURRENT_BADGE = dbc.Badge("Current Position", color="success")
+
 class CurrentParser(ContentParser):
+    __slots__ = ()
     tag = "current"
     def parse(self, element):
-        return dbc.Badge("Current Position", color="success")
+        return _CURRENT_BADGE
 
 class ProgressParser(ContentParser):
+    __slots__ = ()
     tag = "progress"
     def parse(self, element):
         return dbc.Progress(value=int(self.get_content(element)))
 
 class ImageParser(ContentParser):
+    __slots__ = ()
     tag = "image"
     def parse(self, element):
         return dbc.Card(dbc.CardImg(
@@ -103,6 +141,7 @@ class ImageParser(ContentParser):
             ))
 
 class ContactParser(ContentParser):
+    __slots__ = ()
     tag = "contact"
     def parse(self, element):
         button = {}
@@ -133,49 +172,76 @@ class ContactParser(ContentParser):
             ))
 
 # High-level parsers
+def compile_schema(schema):
+    # Precompile each slot filter to an XPath so libxml2 selects the
+    # matching children instead of a Python-level tag test per child
+    compiled = []
+    for name, tags, invert in schema:
+        if invert:
+            expression = "*[not(%s)]" % " or ".join("self::%s" % t for t in sorted(tags))
+        else:
+            expression = "|".join(sorted(tags))
+        compiled.append((name, ET.XPath(expression)))
+    return tuple(compiled)
+
 class NiceCard:
+    __slots__ = ()
     tag = "card"
-    def parse(self, element):
-
-        card_head = parse_elements_with_tag(element, ["head", "subhead"])
-        card_date = parse_elements_with_tag(element, ["date", "time", "current"])
-        card_body = parse_elements_with_tag(element, ["head", "subhead", "date", "time", "current"], invert=True)
+    HEAD_TAGS = frozenset(("head", "subhead"))
+    DATE_TAGS = frozenset(("date", "time", "current"))
+    SCHEMA = compile_schema((
+        ("head", HEAD_TAGS, False),
+        ("date", DATE_TAGS, False),
+        ("body", HEAD_TAGS | DATE_TAGS, True),
+        ))
+    def assemble(self, element, children):
+        slots = collect_with_schema(element, children, self.SCHEMA)
+
+        card_head = slots["head"]
+        card_date = slots["date"]
+        card_body = slots["body"]
 
         card = [dbc.CardHeader(card_head)]
-        if card_date:
-            card_date.append(html.Hr(className="my-2"))
 
-        card.append(
-            dbc.CardBody(
-                card_date
-                + card_body)
-            )
+        body = card_date
+        if body:
+            body.append(html.Hr(className="my-2"))
+        body.extend(card_body)
+
+        card.append(dbc.CardBody(body))
 
         return dbc.Card(card)
 
 class AuthorParser:
+    __slots__ = ()
     tag = "author"
-    def parse(self, element):
-        card_head = parse_elements_with_tag(element, ["head", "subhead"])
-        card_image = parse_elements_with_tag(element, "image")
-        card_contact = parse_elements_with_tag(element, "contact")
-        card_body = parse_elements_with_tag(element, "text")
+    SCHEMA = compile_schema((
+        ("head", frozenset(("head", "subhead")), False),
+        ("image", frozenset(("image",)), False),
+        ("contact", frozenset(("contact",)), False),
+        ("body", frozenset(("text",)), False),
+        ))
+    def assemble(self, element, children):
+        slots = collect_with_schema(element, children, self.SCHEMA)
+
+        card_head = slots["head"]
+        card_image = slots["image"]
+        card_contact = slots["contact"]
+        card_body = slots["body"]
 
         card = [dbc.Col(card_image, width=4)]
-        card.append(
-            dbc.Col(
-                card_head
-                + [
-                html.Hr(className="my-2"),
-                dbc.Row(
-                    [
-                    dbc.Col(card_body),
-                    dbc.Col(card_contact)
-                    ]
-                )
+
+        details = card_head
+        details.append(html.Hr(className="my-2"))
+        details.append(
+            dbc.Row(
+                [
+                dbc.Col(card_body),
+                dbc.Col(card_contact)
                 ]
             )
         )
+        card.append(dbc.Col(details))
 
         return dbc.Card(dbc.Row(card))
 
@@ -200,30 +266,92 @@ PARSERS = [
     DefaultParser,
 ]
 
+# Parsers are stateless, so one shared instance per tag is enough
+PARSER_BY_TAG = {parser.tag: parser() for parser in PARSERS if parser.tag}
+DEFAULT_PARSER = DefaultParser()
+
 def get_element_parser(element):
-    for parser in PARSERS:
-        if parser.tag == element.tag:
-            return parser()
-    return DefaultParser()
+    return PARSER_BY_TAG.get(element.tag, DEFAULT_PARSER)
+
+def normalize(root):
+    # Strip element text once up front so the parsers never reallocate it,
+    # and pre-split link content into its heading and target
+    for element in root.iter():
+        if element.text is not None:
+            element.text = element.text.strip()
+        if element.tag == "link" and element.text:
+            heading, _, link = element.text.partition(";")
+            element.set("_head", heading.strip())
+            element.set("_link", link.strip())
 
 def parse_element(element):
-    parser = get_element_parser(element)
-    return parser.parse(element)
+    # Walk the tree without recursion: collect elements in preorder, then
+    # render in reverse so children are done before their parents.
+    # Parsers with an assemble method consume rendered children; the rest
+    # render from the element alone and are treated as leaves.
+    # The traversal is recorded as parallel arrays instead of one tuple
+    # per node, so the render loop walks flat lists by index.
+    elements = []
+    parsers = []
+    containers = []
+    stack = [element]
+    while stack:
+        e = stack.pop()
+        parser = get_element_parser(e)
+        is_container = hasattr(parser, "assemble")
+        elements.append(e)
+        parsers.append(parser)
+        containers.append(is_container)
+        if is_container:
+            stack.extend(e)
+
+    results = {}
+    for i in range(len(elements) - 1, -1, -1):
+        e = elements[i]
+        if containers[i]:
+            results[id(e)] = parsers[i].assemble(e, [results.pop(id(c)) for c in e])
+        else:
+            results[id(e)] = parsers[i].parse(e)
 
-def get_elements_with_tag(elements, tags, invert=False):
-    if type(tags) not in [str, list]:
-        raise RuntimeError(f"Cant get elements '{tags}' with type '{type(tags)}'")
+    return results[id(element)]
 
+def parse_element_bytes(data):
+    # Entry point for worker processes, which receive serialized subtrees
+    return parse_element(ET.fromstring(data, XML_PARSER))
+
+def collect_with_schema(element, children, schema):
+    # The compiled XPath of each slot selects the matching child elements;
+    # map them back to their rendered components
+    by_id = {id(child): component for child, component in zip(element, children)}
+    return {name: [by_id[id(e)] for e in xpath(element)] for name, xpath in schema}
+
+def _as_tagset(tags):
+    # Lift a single tag or any iterable of tags to a frozenset; everything
+    # downstream only deals in sets
     if isinstance(tags, str):
-        tags = [tags]
+        return frozenset((tags,))
+    try:
+        return frozenset(tags)
+    except TypeError:
+        raise RuntimeError(f"Cant get elements '{tags}' with type '{type(tags)}'")
+
+def get_elements_with_tag(elements, tags, invert=False):
+    tagset = _as_tagset(tags)
 
     if invert:
-        return [e for e in elements if e.tag not in tags]
+        return [e for e in elements if e.tag not in tagset]
     else:
-        return [e for e in elements if e.tag in tags]
+        # lxml compares the tags inside libxml2, no Python-level filter
+        return list(elements.iterchildren(*tagset))
 
-def parse_elements_with_tag(element, tag, invert=False):
-    return [parse_element(e) for e in get_elements_with_tag(element, tag, invert)]
+def parse_elements_with_tag(element, tags, invert=False):
+    return parse_elements_with_tagset(element, _as_tagset(tags), invert)
+
+def parse_elements_with_tagset(element, tagset, invert=False):
+    if invert:
+        return [parse_element(e) for e in element if e.tag not in tagset]
+    else:
+        return [parse_element(e) for e in element.iterchildren(*tagset)]
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -236,19 +364,50 @@ if __name__ == "__main__":
         )
     args = parser.parse_args()
 
-    mytree = ET.parse(args.input)
-    myroot = mytree.getroot()
+    # The input rarely changes, so cache the rendered content on disk and
+    # only reparse when the file does
+    cache_path = args.input + ".cache"
+    stat = os.stat(args.input)
+    key = (stat.st_mtime_ns, stat.st_size)
+
+    content = None
+    if os.path.exists(cache_path):
+        # A cache that cannot be loaded, whatever the reason (truncated
+        # write, stale component classes, wrong content), is just a miss
+        try:
+            with open(cache_path, "rb") as f:
+                cached_key, cached_content = pickle.load(f)
+        except Exception:
+            pass
+        else:
+            if cached_key == key:
+                content = cached_content
+
+    if content is None:
+        mytree = ET.parse(args.input, XML_PARSER)
+        myroot = mytree.getroot()
+        normalize(myroot)
+
+        # The top-level sections are independent subtrees, so render them
+        # in parallel and only assemble the root in this process
+        root_parser = get_element_parser(myroot)
+        if isinstance(root_parser, DefaultParser) and len(myroot):
+            with ProcessPoolExecutor() as executor:
+                parsed = list(executor.map(
+                    parse_element_bytes,
+                    [ET.tostring(child) for child in myroot]
+                    ))
+            content = [root_parser.assemble(myroot, parsed)]
+        else:
+            content = [parse_element(myroot)]
 
-    content = []
-    content.append(parse_element(myroot))
+        # Write through a temp file so a partial dump can never be loaded
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((key, content), f)
+        os.replace(tmp_path, cache_path)
 
     app = dash.Dash(external_stylesheets=[dbc.themes.BOOTSTRAP])
-
-    CONTENT_STYLE = {
-        "margin-left": "3rem",
-        "margin-right": "3rem",
-        "padding": "2rem 1rem",
-    }
     app.layout = html.Div(content, style=CONTENT_STYLE)
 
     app.run_server(port=8888)
\ No newline at end of file